@@ -1,11 +1,82 @@
 import copy
-from typing import Any, Dict
+from collections import Counter
+from typing import Any, Dict, List, Union
 from uuid import uuid4
 
 import y_py as Y
 
 from .utils import cast_all
 
+# state keys that are kept when a document's content is replaced
+_PRESERVED_STATE_KEYS = frozenset({"dirty"})
+
+# notebook metadata keys needed to build the JSON model
+_MODEL_META_KEYS = frozenset({"metadata", "nbformat", "nbformat_minor"})
+
+# cell used when a notebook is set without cells (create_ycell gives it an id)
+_EMPTY_CELL = {
+    "cell_type": "code",
+    "execution_count": None,
+    "metadata": {},
+    "outputs": [],
+    "source": "",
+}
+
+
+def _coerce_text(text: Union[str, List[str]]) -> str:
+    # nbformat multiline strings can be a list of lines
+    if isinstance(text, str):
+        return text
+    # avoid joining the common empty and single-line lists
+    if not text:
+        return ""
+    if len(text) == 1:
+        return text[0]
+    return "".join(text)
+
+
+def _common_prefix_len(a: str, b: str) -> int:
+    # binary search on slice comparisons, which run in C rather than one character at a time
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[low:mid] == b[low:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def _common_suffix_len(a: str, b: str, max_len: int) -> int:
+    low, high = 0, max_len
+    len_a, len_b = len(a), len(b)
+    while low < high:
+        mid = (low + high + 1) // 2
+        a_start, a_end = len_a - mid, len_a - low
+        b_start, b_end = len_b - mid, len_b - low
+        if a[a_start:a_end] == b[b_start:b_end]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def _json_equal(a: Any, b: Any) -> bool:
+    # unlike ==, tell apart values of different types (e.g. True and 1)
+    if isinstance(a, dict):
+        return (
+            isinstance(b, dict)
+            and a.keys() == b.keys()
+            and all(_json_equal(v, b[k]) for k, v in a.items())
+        )
+    if isinstance(a, list):
+        return (
+            isinstance(b, list)
+            and len(a) == len(b)
+            and all(_json_equal(v, w) for v, w in zip(a, b))
+        )
+    return type(a) is type(b) and a == b
+
 
 class YBaseDoc:
     def __init__(self, ydoc: Y.YDoc):
@@ -62,14 +133,33 @@ class YFile(YBaseDoc):
         return str(self._ysource)
 
     def set(self, value):
+        old_value = str(self._ysource)
+        if value == old_value:
+            return
+        if not old_value or not value:
+            # nothing to compare: clear and/or fill the document
+            with self._ydoc.begin_transaction() as t:
+                if old_value:
+                    self._ysource.delete_range(t, 0, len(self._ysource))
+                if value:
+                    self._ysource.extend(t, value)
+            return
+        # only replace the part of the text between the common prefix and suffix
+        prefix_len = _common_prefix_len(old_value, value)
+        suffix_len = _common_suffix_len(
+            old_value, value, min(len(old_value), len(value)) - prefix_len
+        )
+        old_end = len(old_value) - suffix_len
+        new_end = len(value) - suffix_len
+        removed = old_value[prefix_len:old_end]
+        inserted = value[prefix_len:new_end]
+        # YText indices are UTF-8 byte offsets
+        index = len(old_value[:prefix_len].encode())
         with self._ydoc.begin_transaction() as t:
-            # clear document
-            source_len = len(self._ysource)
-            if source_len:
-                self._ysource.delete_range(t, 0, source_len)
-            # initialize document
-            if value:
-                self._ysource.extend(t, value)
+            if removed:
+                self._ysource.delete_range(t, index, len(removed.encode()))
+            if inserted:
+                self._ysource.insert(t, index, inserted)
 
     def observe(self, callback):
         self.unobserve()
@@ -83,9 +173,16 @@ class YNotebook(YBaseDoc):
         self._ymeta = self._ydoc.get_map("meta")
         self._ycells = self._ydoc.get_array("cells")
 
-    def get_cell(self, index: int) -> Dict[str, Any]:
+    def _get_meta(self) -> Dict[str, Any]:
         meta = self._ymeta.to_json()
-        cell = self._ycells[index].to_json()
+        cast_all(meta, float, int)
+        return meta
+
+    def get_cell(self, index: int) -> Dict[str, Any]:
+        return self._get_cell(self._ycells[index], self._get_meta())
+
+    def _get_cell(self, ycell: Y.YMap, meta: Dict[str, Any]) -> Dict[str, Any]:
+        cell = ycell.to_json()
         cast_all(cell, float, int)
         if "id" in cell and meta["nbformat"] == 4 and meta["nbformat_minor"] <= 4:
             # strip cell IDs if we have notebook format 4.0-4.4
@@ -98,8 +195,15 @@ class YNotebook(YBaseDoc):
             del cell["attachments"]
         return cell
 
+    def cell_type_counts(self) -> Dict[str, int]:
+        # only read the "cell_type" key of each cell, without converting it to JSON
+        counts: Counter = Counter()
+        for ycell in self._ycells:
+            counts[str(ycell["cell_type"])] += 1
+        return dict(counts)
+
     def append_cell(self, value: Dict[str, Any], txn=None) -> None:
-        ycell = self.create_ycell(value)
+        ycell = self._create_ycell(value)
         if txn is None:
             with self._ydoc.begin_transaction() as txn:
                 self._ycells.append(txn, ycell)
@@ -107,15 +211,23 @@ class YNotebook(YBaseDoc):
             self._ycells.append(txn, ycell)
 
     def set_cell(self, index: int, value: Dict[str, Any], txn=None) -> None:
-        ycell = self.create_ycell(value)
+        ycell = self._create_ycell(value)
         self.set_ycell(index, ycell, txn)
 
     def create_ycell(self, value: Dict[str, Any]) -> None:
-        cell = copy.deepcopy(value)
+        # the returned cell may be added to the document later: it must not share
+        # the caller's containers, which could change in the meantime
+        return self._create_ycell(copy.deepcopy(value))
+
+    def _create_ycell(self, value: Dict[str, Any]) -> Y.YMap:
+        # a shallow copy is enough if the cell is added to the document right away:
+        # only top-level keys are replaced, and the Y types copy their initial content
+        # when they are integrated into the document
+        cell = dict(value)
         if "id" not in cell:
-            cell["id"] = str(uuid4())
+            cell["id"] = uuid4().hex
         cell_type = cell["cell_type"]
-        cell["source"] = Y.YText(cell["source"])
+        cell["source"] = Y.YText(_coerce_text(cell["source"]))
         cell["metadata"] = Y.YMap(cell.get("metadata", {}))
         if cell_type in ("raw", "markdown"):
             cell["attachments"] = Y.YMap(cell.get("attachments", {}))
@@ -133,21 +245,9 @@ class YNotebook(YBaseDoc):
             self._ycells.insert(txn, index, ycell)
 
     def get(self):
-        meta = self._ymeta.to_json()
-        cast_all(meta, float, int)
-        cells = []
-        for i in range(len(self._ycells)):
-            cell = self.get_cell(i)
-            if "id" in cell and meta["nbformat"] == 4 and meta["nbformat_minor"] <= 4:
-                # strip cell IDs if we have notebook format 4.0-4.4
-                del cell["id"]
-            if (
-                "attachments" in cell
-                and cell["cell_type"] in ["raw", "markdown"]
-                and not cell["attachments"]
-            ):
-                del cell["attachments"]
-            cells.append(cell)
+        # convert the notebook metadata once for all cells
+        meta = self._get_meta()
+        cells = [self._get_cell(ycell, meta) for ycell in self._ycells]
 
         return dict(
             cells=cells,
@@ -156,32 +256,46 @@ class YNotebook(YBaseDoc):
             nbformat_minor=int(meta["nbformat_minor"]),
         )
 
+    def _is_unchanged(self, value: Dict[str, Any]) -> bool:
+        # same result as _json_equal(value, self.get()), but cheapest checks first
+        # and stopping at the first difference
+        if value.keys() != _MODEL_META_KEYS | {"cells"}:
+            return False
+        if len(value["cells"]) != len(self._ycells):
+            return False
+        if not all(key in self._ymeta for key in _MODEL_META_KEYS):
+            return False
+        meta = self._get_meta()
+        if not all(_json_equal(value[key], meta[key]) for key in _MODEL_META_KEYS):
+            return False
+        return all(
+            _json_equal(cell, self._get_cell(ycell, meta))
+            for cell, ycell in zip(value["cells"], self._ycells)
+        )
+
     def set(self, value):
-        nb_without_cells = {key: value[key] for key in value.keys() if key != "cells"}
-        nb = copy.deepcopy(nb_without_cells)
-        cast_all(nb, int, float)
-        cells = value["cells"] or [
-            {
-                "cell_type": "code",
-                "execution_count": None,
-                "metadata": {},
-                "outputs": [],
-                "source": "",
-                "id": str(uuid4()),
-            }
-        ]
+        # setting the same content again (e.g. when reloading a saved notebook)
+        # must not recreate all the cells
+        unchanged = self._is_unchanged(value)
         with self._ydoc.begin_transaction() as t:
             # clear document
+            for key in list(self._ystate):
+                if key not in _PRESERVED_STATE_KEYS:
+                    self._ystate.pop(t, key)
+            if unchanged:
+                return
+            nb_without_cells = {key: value[key] for key in value.keys() if key != "cells"}
+            nb = copy.deepcopy(nb_without_cells)
+            cast_all(nb, int, float)
+            cells = value["cells"] or [_EMPTY_CELL]
             cells_len = len(self._ycells)
             for key in self._ymeta:
                 self._ymeta.pop(t, key)
             if cells_len:
                 self._ycells.delete_range(t, 0, cells_len)
-            for key in [k for k in self._ystate if k != "dirty"]:
-                self._ystate.pop(t, key)
 
             # initialize document
-            self._ycells.extend(t, [self.create_ycell(cell) for cell in cells])
+            self._ycells.extend(t, [self._create_ycell(cell) for cell in cells])
             self._ymeta.set(t, "metadata", nb["metadata"])
             self._ymeta.set(t, "nbformat", nb["nbformat"])
             self._ymeta.set(t, "nbformat_minor", nb["nbformat_minor"])
@@ -1,5 +1,5 @@
+import asyncio
 import json
-import subprocess
 from pathlib import Path
 
 import pytest
@@ -14,15 +14,22 @@ from ypy_websocket import WebsocketServer
 def update_json_file(path: Path, d: dict):
     with open(path, "rb") as f:
         package_json = json.load(f)
+    if d.items() <= package_json.items():
+        # already up-to-date
+        return
     package_json.update(d)
     with open(path, "wt") as f:
         json.dump(package_json, f, indent=2)
 
 
 here = Path(__file__).parent
-d = {"type": "module"}
-update_json_file(here / "node_modules/@jupyterlab/shared-models/package.json", d)
-update_json_file(here / "node_modules/y-websocket/package.json", d)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def node_modules_as_es_modules():
+    d = {"type": "module"}
+    update_json_file(here / "node_modules/@jupyterlab/shared-models/package.json", d)
+    update_json_file(here / "node_modules/y-websocket/package.json", d)
 
 
 @pytest.fixture
@@ -37,14 +44,14 @@ async def yws_server(request):
 
 
 @pytest.fixture
-def yjs_client(request):
+async def yjs_client(request):
     client_id = request.param
-    p = subprocess.Popen(
-        [
-            "node",
-            "--experimental-specifier-resolution=node",
-            f"{here / 'yjs_client_'}{client_id}.js",
-        ]
+    p = await asyncio.create_subprocess_exec(
+        "node",
+        "--experimental-specifier-resolution=node",
+        f"{here / 'yjs_client_'}{client_id}.js",
     )
     yield p
-    p.kill()
+    if p.returncode is None:
+        p.kill()
+    await p.wait()
@@ -0,0 +1,146 @@
+import json
+from pathlib import Path
+
+import pytest
+import y_py as Y
+
+from jupyter_ydoc import YFile, YNotebook
+
+files_dir = Path(__file__).parent / "files"
+
+
+def sync(dst: Y.YDoc, src: Y.YDoc):
+    update = Y.encode_state_as_update(src, Y.encode_state_vector(dst))
+    Y.apply_update(dst, update)
+
+
+def observe_deltas(yfile: YFile) -> list:
+    deltas = []
+    # the event must not outlive the callback
+    yfile.observe(lambda event: deltas.append(event.delta))
+    return deltas
+
+
+def file_edits(char: str) -> dict:
+    # text "ab{char}cd" edited at the start, in the middle and at the end
+    size = len(char.encode())
+    return {
+        "start": (f"{char}ab{char}cd", [{"insert": char}]),
+        "middle": (f"ab{char}{char}!cd", [{"retain": 2 + size}, {"insert": f"{char}!"}]),
+        "end": (f"ab{char}{char}", [{"retain": 2 + size}, {"delete": 2}, {"insert": char}]),
+        "delete": ("abcd", [{"retain": 2}, {"delete": size}]),
+    }
+
+
+@pytest.mark.parametrize("char", ["z", "é", "中", "😀"], ids=["ascii", "2-byte", "cjk", "4-byte"])
+@pytest.mark.parametrize("edit", ["start", "middle", "end", "delete"])
+def test_yfile_set_edits_changed_range(char, edit):
+    yfile = YFile(Y.YDoc())
+    yfile.set(f"ab{char}cd")
+    deltas = observe_deltas(yfile)
+    value, delta = file_edits(char)[edit]
+    yfile.set(value)
+    assert yfile.get() == value
+    assert deltas == [delta]
+
+
+@pytest.mark.parametrize(
+    "old, new, delta",
+    [("", "中😀", [{"insert": "中😀"}]), ("中😀", "", [{"delete": 7}])],
+    ids=["fill", "clear"],
+)
+def test_yfile_set_from_or_to_empty(old, new, delta):
+    yfile = YFile(Y.YDoc())
+    yfile.set(old)
+    deltas = observe_deltas(yfile)
+    yfile.set(new)
+    assert yfile.get() == new
+    assert deltas == [delta]
+
+
+def test_yfile_set_same_text():
+    yfile = YFile(Y.YDoc())
+    yfile.set("ab中😀cd")
+    deltas = observe_deltas(yfile)
+    yfile.set("ab中😀cd")
+    assert yfile.get() == "ab中😀cd"
+    assert deltas == []
+
+
+def test_set_preserves_cells_when_unchanged():
+    nb = YNotebook(Y.YDoc())
+    nb.set(json.loads((files_dir / "nb0.ipynb").read_text()))
+    changes = []
+    nb.observe(lambda event: changes.append(None))
+    nb.set(nb.get())
+    assert changes == []
+
+
+def test_set_reverts_peer_edit():
+    nb = YNotebook(Y.YDoc())
+    nb.set(json.loads((files_dir / "nb0.ipynb").read_text()))
+    saved = nb.get()
+    peer = YNotebook(Y.YDoc())
+    sync(peer.ydoc, nb.ydoc)
+    with peer.ydoc.begin_transaction() as t:
+        peer._ycells[0]["source"].extend(t, "\nprint('Bye!')")
+    sync(nb.ydoc, peer.ydoc)
+    assert nb.get() != saved
+    nb.set(saved)
+    assert nb.get() == saved
+
+
+def test_set_applies_changes_between_equal_values_of_different_types():
+    nb = YNotebook(Y.YDoc())
+    model = json.loads((files_dir / "nb0.ipynb").read_text())
+    model["cells"][0]["metadata"] = {"collapsed": 1}
+    nb.set(model)
+    model["cells"][0]["metadata"] = {"collapsed": True}
+    nb.set(model)
+    assert nb.get_cell(0)["metadata"]["collapsed"] is True
+
+
+def test_cell_type_counts():
+    nb = YNotebook(Y.YDoc())
+    model = json.loads((files_dir / "nb0.ipynb").read_text())
+    code_cell = model["cells"][0]
+    model["cells"] = [
+        code_cell,
+        {"cell_type": "markdown", "metadata": {}, "source": "# Title"},
+        code_cell,
+        {"cell_type": "raw", "metadata": {}, "source": ""},
+    ]
+    nb.set(model)
+    assert nb.cell_type_counts() == {"code": 2, "markdown": 1, "raw": 1}
+
+
+def test_cell_type_counts_empty_notebook():
+    assert YNotebook(Y.YDoc()).cell_type_counts() == {}
+
+
+@pytest.mark.parametrize(
+    "source, text", [([], ""), (["a"], "a"), (["a\n", "b"], "a\nb")], ids=["empty", "one", "two"]
+)
+def test_cell_list_source(source, text):
+    nb = YNotebook(Y.YDoc())
+    nb.set(json.loads((files_dir / "nb0.ipynb").read_text()))
+    nb.set_cell(0, {"cell_type": "markdown", "metadata": {}, "source": source})
+    assert nb.get_cell(0)["source"] == text
+
+
+def test_create_ycell_copies_value():
+    nb = YNotebook(Y.YDoc())
+    nb.set(json.loads((files_dir / "nb0.ipynb").read_text()))
+    cell = {
+        "cell_type": "code",
+        "execution_count": None,
+        "metadata": {"jupyter": {"source_hidden": False}},
+        "outputs": [{"output_type": "stream", "name": "stdout", "text": "hi"}],
+        "source": "print('hi')",
+    }
+    ycell = nb.create_ycell(cell)
+    cell["metadata"]["jupyter"]["source_hidden"] = True
+    cell["outputs"][0]["text"] = "MUTATED"
+    nb.set_ycell(0, ycell)
+    assert nb.get_cell(0)["metadata"] == {"jupyter": {"source_hidden": False}}
+    assert nb.get_cell(0)["outputs"] == [{"output_type": "stream", "name": "stdout", "text": "hi"}]